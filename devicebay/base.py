@@ -1,6 +1,21 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
 import time
-from typing import Optional, TypeVar, Type, Generic
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Type,
+    Tuple,
+    TypeVar,
+    get_args,
+    get_origin,
+)
 
 from pydantic import BaseModel
 from toolfuse import Tool
@@ -10,19 +25,104 @@ from .models import V1Device, V1Lock, V1DeviceType
 D = TypeVar("D", bound="Device")
 C = TypeVar("C", bound="BaseModel")
 P = TypeVar("P", bound="BaseModel")
+R = TypeVar("R")
+
+# Parametrized V1Device models keyed by connect config type
+_V1_DEVICE_CACHE: Dict[type, Type[V1Device]] = {}
+
+# Subscripted Device aliases keyed by (class, params)
+_GENERIC_ALIAS_CACHE: Dict[Tuple[type, Any], Any] = {}
+
+# Marks the worker threads of MultiDevice._executor
+_fan_out_worker = threading.local()
+
+
+def _mark_fan_out_worker() -> None:
+    _fan_out_worker.active = True
+
+
+def _connect_config_type_param(cls: Type["Device"]) -> Type[BaseModel]:
+    """Type of connect configuration, from the generic parameters of a device"""
+    return cls._CONNECT_CONFIG_TYPE  # type: ignore
+
+
+def _provision_config_type_param(cls: Type["Device"]) -> Type[BaseModel]:
+    """Type of provision configuration, from the generic parameters of a device"""
+    return cls._PROVISION_CONFIG_TYPE  # type: ignore
+
+
+def _v1_device_model(config_type: Type[BaseModel]) -> Type[V1Device]:
+    """Get the V1Device model parametrized with a connect config type
+
+    Args:
+        config_type (Type[BaseModel]): Type of connect configuration
+
+    Returns:
+        Type[V1Device]: The parametrized model
+    """
+    model = _V1_DEVICE_CACHE.get(config_type)
+    if model is None:
+        model = _V1_DEVICE_CACHE.setdefault(config_type, V1Device[config_type])
+    return model
 
 
 class ReactComponent:
     """A react component for a device"""
 
-    source: str
-    server_uri: str
-    token: Optional[str] = None
+    __slots__ = ("source", "server_uri", "token")
+
+    def __init__(
+        self,
+        source: Optional[str] = None,
+        server_uri: Optional[str] = None,
+        token: Optional[str] = None,
+    ) -> None:
+        self.source = source
+        self.server_uri = server_uri
+        self.token = token
 
 
 class Device(Generic[C, D, P], Tool, ABC):
     """An agent device"""
 
+    _CONNECT_CONFIG_TYPE: Optional[Type[BaseModel]] = None
+    _PROVISION_CONFIG_TYPE: Optional[Type[BaseModel]] = None
+    _lock: Optional[V1Lock] = None
+    # Whether the device may be driven from a thread other than its creator
+    _THREAD_SAFE: bool = True
+
+    def __class_getitem__(cls, params):
+        key = (cls, params)
+        try:
+            alias = _GENERIC_ALIAS_CACHE.get(key)
+        except TypeError:
+            # Unhashable parameters, let typing handle them uncached
+            return super().__class_getitem__(params)  # type: ignore
+        if alias is None:
+            alias = super().__class_getitem__(params)  # type: ignore
+            _GENERIC_ALIAS_CACHE[key] = alias
+        return alias
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        connect_type = provision_type = None
+        for base in cls.__dict__.get("__orig_bases__", ()):
+            if get_origin(base) is Device:
+                connect_type, _, provision_type = get_args(base)
+
+        # Classmethods declared by the subclass are resolved on first use, as
+        # they may return config classes defined later in the module
+        if "connect_config_type" in cls.__dict__:
+            cls._CONNECT_CONFIG_TYPE = None
+        elif isinstance(connect_type, type):
+            cls._CONNECT_CONFIG_TYPE = connect_type
+            cls.connect_config_type = classmethod(_connect_config_type_param)
+        if "provision_config_type" in cls.__dict__:
+            cls._PROVISION_CONFIG_TYPE = None
+        elif isinstance(provision_type, type):
+            cls._PROVISION_CONFIG_TYPE = provision_type
+            cls.provision_config_type = classmethod(_provision_config_type_param)
+
     @classmethod
     @abstractmethod
     def connect(cls, config: C) -> D:
@@ -123,17 +223,11 @@ class Device(Generic[C, D, P], Tool, ABC):
 
     def get_lock(self) -> Optional[V1Lock]:
         """Get the lock for the device"""
-        if not hasattr(self, "_lock"):
-            return None
         return self._lock
 
     def is_locked(self) -> bool:
         """Check if the device is locked"""
-        if not hasattr(self, "_lock"):
-            return False
-        if self._lock is None:
-            return False
-        return self._lock.locked
+        return self._lock is not None and self._lock.locked
 
     def unlock(self) -> None:
         """Unlock the device"""
@@ -141,13 +235,13 @@ class Device(Generic[C, D, P], Tool, ABC):
 
     def lock(self, owner_id: str, expires_in: int = 600) -> None:
         """Lock the device"""
-        if hasattr(self, "_lock"):
-            if self._lock and self._lock.locked:
-                raise RuntimeError("Device is already locked")
-        self._lock = V1Lock(
+        if self._lock is not None and self._lock.locked:
+            raise RuntimeError("Device is already locked")
+        now = time.time()
+        self._lock = V1Lock.model_construct(
             owner_id=owner_id,
-            created=time.time(),
-            expires=time.time() + expires_in,
+            created=now,
+            expires=now + expires_in,
             locked=True,
         )
 
@@ -157,13 +251,18 @@ class Device(Generic[C, D, P], Tool, ABC):
         Returns:
             V1Device: A v1 device
         """
-        config_type = self.connect_config_type()
+        config_type = self._CONNECT_CONFIG_TYPE
+        if config_type is None:
+            config_type = self.connect_config_type()
+            type(self)._CONNECT_CONFIG_TYPE = config_type
         config_instance = self.connect_config()
-        if not isinstance(config_instance, config_type):
+        if type(config_instance) is not config_type and not isinstance(
+            config_instance, config_type
+        ):
             raise TypeError(
                 f"Expected config instance of type {config_type.__name__}, but got {type(config_instance).__name__}"
             )
-        parametrized_device_model = V1Device[config_type](
+        parametrized_device_model = _v1_device_model(config_type)(
             name=self.name(), type=self.type(), config=config_instance
         )
         return parametrized_device_model
@@ -174,6 +273,69 @@ class Device(Generic[C, D, P], Tool, ABC):
 
 
 class MultiDevice(Device):
-    """A device of multiple devices"""
+    """A device of multiple devices
+
+    An abstract base: it fans disconnect and view out to its devices, while
+    subclasses implement connecting, provisioning and their connect
+    configuration, which is a single config of their own type.
+    """
+
+    _executor = ThreadPoolExecutor(
+        max_workers=min(32, (os.cpu_count() or 1) * 4),
+        thread_name_prefix="devicebay",
+        initializer=_mark_fan_out_worker,
+    )
+
+    def __init__(self, devices: List[Device]) -> None:
+        super().__init__()
+        self._devices = devices
 
-    pass
+    def devices(self) -> List[Device]:
+        """Devices in this device
+
+        Returns:
+            List[Device]: The devices
+        """
+        return self._devices
+
+    def _fan_out(self, fn: Callable[[Device], R]) -> List[R]:
+        """Call a function on every device, overlapping their I/O
+
+        Devices that are not thread safe are called on the current thread, as
+        are all devices of a MultiDevice nested in one already fanning out, so
+        pool workers never block waiting on the pool.
+
+        Args:
+            fn (Callable[[Device], R]): Function to call with each device
+
+        Returns:
+            List[R]: Results in device order
+        """
+        if len(self._devices) < 2 or getattr(_fan_out_worker, "active", False):
+            return [fn(device) for device in self._devices]
+
+        futures = [
+            self._executor.submit(fn, device) if device._THREAD_SAFE else None
+            for device in self._devices
+        ]
+        inline = {
+            i: fn(device)
+            for i, (device, future) in enumerate(zip(self._devices, futures))
+            if future is None
+        }
+        return [
+            inline[i] if future is None else future.result()
+            for i, future in enumerate(futures)
+        ]
+
+    def disconnect(self) -> None:
+        """Disconnect from all devices"""
+        self._fan_out(lambda device: device.disconnect())
+
+    def view(self, background: bool = False) -> None:
+        """View all devices in the browser
+
+        Args:
+            background (bool, optional): Whether to run in the background. Defaults to False.
+        """
+        self._fan_out(lambda device: device.view(background=background))
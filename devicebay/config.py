@@ -3,19 +3,27 @@ Configuration for devicebay
 """
 
 import os
-import time
+
+
+def _agentsea_dir(env_var: str, default: str) -> str:
+    """Directory from an env var, falling back to a default under AGENTSEA_HOME"""
+    value = os.environ.get(env_var)
+    if value is None:
+        return default
+    return os.path.expanduser(value)
+
 
 AGENTSEA_HOME = os.path.expanduser(os.environ.get("AGENTSEA_HOME", "~/.agentsea"))
-AGENTSEA_DB_DIR = os.path.expanduser(
-    os.environ.get("AGENTSEA_DB_DIR", os.path.join(AGENTSEA_HOME, "data"))
+AGENTSEA_DB_DIR = _agentsea_dir("AGENTSEA_DB_DIR", os.path.join(AGENTSEA_HOME, "data"))
+AGENTSEA_LOG_DIR = _agentsea_dir(
+    "AGENTSEA_LOG_DIR", os.path.join(AGENTSEA_HOME, "logs")
 )
-AGENTSEA_LOG_DIR = os.path.expanduser(
-    os.environ.get("AGENTSEA_LOG_DIR", os.path.join(AGENTSEA_HOME, "logs"))
-)
-AGENTSEA_PROC_DIR = os.path.expanduser(
-    os.environ.get("AGENTSEA_PROC_DIR", os.path.join(AGENTSEA_HOME, "proc"))
+AGENTSEA_PROC_DIR = _agentsea_dir(
+    "AGENTSEA_PROC_DIR", os.path.join(AGENTSEA_HOME, "proc")
 )
 DB_TEST = os.environ.get("AGENTSEA_DB_TEST", "false") == "true"
 DB_NAME = os.environ.get("DEVICES_DB_NAME", "devices.db")
 if DB_TEST:
+    import time
+
     DB_NAME = f"devices_test_{int(time.time())}.db"
@@ -1,7 +1,14 @@
-from typing import Optional, Type
+import asyncio
+from typing import Any, Awaitable, List, Optional
 
 from pydantic import BaseModel
 from playwright.sync_api import sync_playwright, Browser, Page
+from playwright.async_api import (
+    async_playwright,
+    Browser as AsyncBrowser,
+    BrowserContext as AsyncBrowserContext,
+    Page as AsyncPage,
+)
 
 from devicebay import Device, action, observation, ReactComponent
 
@@ -24,6 +31,9 @@ class Playwright(
 ):
     """A Playwright device"""
 
+    # The sync Playwright API is bound to the thread that started it
+    _THREAD_SAFE = False
+
     def __init__(
         self,
         config: PlaywrightConnectConfig,
@@ -104,23 +114,230 @@ class Playwright(
         """
         return self._config
 
+    @action
+    def navigate(self, url: str) -> None:
+        """Navigate to a URL
+
+        Args:
+            url (str): URL to navigate to
+        """
+        self._page.goto(url)
+
+    @observation
+    def get_url(self) -> str:
+        """Get the current URL
+
+        Returns:
+            str: The current URL
+        """
+        return self._page.url
+
+    @action
+    def click(self, selector: str) -> None:
+        """Click on an element
+
+        Args:
+            selector (str): CSS selector of the element to click
+        """
+        self._page.click(selector)
+
+    @action
+    def type(self, selector: str, text: str) -> None:
+        """Type text into an element
+
+        Args:
+            selector (str): CSS selector of the element to type into
+            text (str): Text to type
+        """
+        self._page.fill(selector, text)
+
+    @observation
+    def get_text(self, selector: str) -> str:
+        """Get the text of an element
+
+        Args:
+            selector (str): CSS selector of the element
+
+        Returns:
+            str: The text of the element
+        """
+        return self._page.inner_text(selector)
+
+    @observation
+    def get_page_source(self) -> str:
+        """Get the page source
+
+        Returns:
+            str: The page source
+        """
+        return self._page.content()
+
+    @action
+    def press_key(self, selector: str, key: str) -> None:
+        """Press a key on an element
+
+        Args:
+            selector (str): CSS selector of the element
+            key (str): Key to press
+        """
+        self._page.press(selector, key)
+
+    @action
+    def hover(self, selector: str) -> None:
+        """Hover over an element
+
+        Args:
+            selector (str): CSS selector of the element to hover over
+        """
+        self._page.hover(selector)
+
+    @observation
+    def get_attribute(self, selector: str, name: str) -> Optional[str]:
+        """Get an attribute of an element
+
+        Args:
+            selector (str): CSS selector of the element
+            name (str): Name of the attribute
+
+        Returns:
+            str: The attribute value
+        """
+        return self._page.get_attribute(selector, name)
+
+
+class AsyncPlaywright(
+    Device[PlaywrightConnectConfig, "AsyncPlaywright", PlaywrightProvisionConfig]
+):
+    """A Playwright device backed by the async Playwright API
+
+    Actions and observations block like those of `Playwright`. Each one that
+    talks to the browser also has an `_async` coroutine counterpart, which can be
+    pipelined on the device loop with `gather`, e.g.
+    `device.gather(device.click_async("#a"), device.hover_async("#b"))`.
+    `get_url` reads the page's cached URL and has none.
+    """
+
+    # The event loop is driven from the thread that created the device
+    _THREAD_SAFE = False
+
+    def __init__(
+        self,
+        config: PlaywrightConnectConfig,
+    ) -> None:
+        super().__init__()
+        self._config = config
+        self._loop = asyncio.new_event_loop()
+        self._playwright = self._run(async_playwright().start())
+        self._browser: AsyncBrowser = self._run(
+            getattr(self._playwright, config.browser_type).launch(
+                headless=config.headless
+            )
+        )
+        # Pages share one context so opening another is cheap
+        self._context: AsyncBrowserContext = self._run(self._browser.new_context())
+        self._page: AsyncPage = self._run(self._context.new_page())
+
+    def _run(self, coro: Awaitable[Any]) -> Any:
+        """Run a coroutine to completion on the device loop"""
+        return self._loop.run_until_complete(coro)
+
+    def gather(self, *coros: Awaitable[Any]) -> List[Any]:
+        """Run coroutines concurrently on the device loop
+
+        Returns:
+            List[Any]: Results in the order given
+        """
+
+        async def gather_all() -> List[Any]:
+            return list(await asyncio.gather(*coros))
+
+        return self._run(gather_all())
+
+    @classmethod
+    def connect(cls, config: PlaywrightConnectConfig) -> "AsyncPlaywright":
+        """Connect to a device from a configuration
+
+        Args:
+            config (PlaywrightConnectConfig): Config
+
+        Returns:
+            AsyncPlaywright: The device
+        """
+        return cls(config)
+
+    def disconnect(self) -> None:
+        """Disconnect from the device"""
+        self._run(self._context.close())
+        self._run(self._browser.close())
+        self._run(self._playwright.stop())
+        self._loop.close()
+
     @classmethod
-    def connect_config_type(cls) -> Type[PlaywrightConnectConfig]:
-        """Type of connect configuration
+    def ensure(cls, name: str, config: PlaywrightProvisionConfig) -> "AsyncPlaywright":
+        """Ensure device infrastructure exists
+
+        Args:
+            name (str): Name of the device
+            config (PlaywrightProvisionConfig): Provisioner configuration
 
         Returns:
-            Type[PlaywrightConnectConfig]: Type of connect configuration
+            AsyncPlaywright: The device
         """
-        return PlaywrightConnectConfig
+        return cls(PlaywrightConnectConfig())
 
     @classmethod
-    def provision_config_type(cls) -> Type[PlaywrightProvisionConfig]:
-        """Type of provision configuration
+    def create(cls, name: str, config: PlaywrightProvisionConfig) -> "AsyncPlaywright":
+        """Create device infrastructure
+
+        Args:
+            name (str): Name of the device
+            config (PlaywrightProvisionConfig): Provisioner configuration
+
+        Returns:
+            AsyncPlaywright: The device
+        """
+        return cls(PlaywrightConnectConfig())
+
+    @classmethod
+    def react_component(cls) -> Optional[ReactComponent]:
+        """React component for the device
+
+        Returns:
+            ReactComponent: React component
+        """
+        return None
+
+    def view(self, background: bool = False) -> None:
+        """View the device in the browser
+
+        Args:
+            background (bool, optional): Whether to run in the background. Defaults to False.
+        """
+        pass
+
+    def connect_config(self) -> PlaywrightConnectConfig:
+        """Connect configuration
 
         Returns:
-            Type[PlaywrightProvisionConfig]: Type of provisioner configuration
+            PlaywrightConnectConfig: Connect configuration for this device
+        """
+        return self._config
+
+    def new_page(self) -> AsyncPage:
+        """Open a new page in the shared browser context
+
+        Returns:
+            AsyncPage: The page
+        """
+        return self._run(self._context.new_page())
+
+    async def navigate_async(self, url: str) -> None:
+        """Navigate to a URL
+
+        Args:
+            url (str): URL to navigate to
         """
-        return PlaywrightProvisionConfig
+        await self._page.goto(url)
 
     @action
     def navigate(self, url: str) -> None:
@@ -129,7 +346,7 @@ class Playwright(
         Args:
             url (str): URL to navigate to
         """
-        self._page.goto(url)
+        self._run(self.navigate_async(url))
 
     @observation
     def get_url(self) -> str:
@@ -140,6 +357,14 @@ class Playwright(
         """
         return self._page.url
 
+    async def click_async(self, selector: str) -> None:
+        """Click on an element
+
+        Args:
+            selector (str): CSS selector of the element to click
+        """
+        await self._page.click(selector)
+
     @action
     def click(self, selector: str) -> None:
         """Click on an element
@@ -147,7 +372,16 @@ class Playwright(
         Args:
             selector (str): CSS selector of the element to click
         """
-        self._page.click(selector)
+        self._run(self.click_async(selector))
+
+    async def type_async(self, selector: str, text: str) -> None:
+        """Type text into an element
+
+        Args:
+            selector (str): CSS selector of the element to type into
+            text (str): Text to type
+        """
+        await self._page.fill(selector, text)
 
     @action
     def type(self, selector: str, text: str) -> None:
@@ -157,7 +391,18 @@ class Playwright(
             selector (str): CSS selector of the element to type into
             text (str): Text to type
         """
-        self._page.fill(selector, text)
+        self._run(self.type_async(selector, text))
+
+    async def get_text_async(self, selector: str) -> str:
+        """Get the text of an element
+
+        Args:
+            selector (str): CSS selector of the element
+
+        Returns:
+            str: The text of the element
+        """
+        return await self._page.inner_text(selector)
 
     @observation
     def get_text(self, selector: str) -> str:
@@ -169,7 +414,15 @@ class Playwright(
         Returns:
             str: The text of the element
         """
-        return self._page.inner_text(selector)
+        return self._run(self.get_text_async(selector))
+
+    async def get_page_source_async(self) -> str:
+        """Get the page source
+
+        Returns:
+            str: The page source
+        """
+        return await self._page.content()
 
     @observation
     def get_page_source(self) -> str:
@@ -178,7 +431,16 @@ class Playwright(
         Returns:
             str: The page source
         """
-        return self._page.content()
+        return self._run(self.get_page_source_async())
+
+    async def press_key_async(self, selector: str, key: str) -> None:
+        """Press a key on an element
+
+        Args:
+            selector (str): CSS selector of the element
+            key (str): Key to press
+        """
+        await self._page.press(selector, key)
 
     @action
     def press_key(self, selector: str, key: str) -> None:
@@ -188,7 +450,15 @@ class Playwright(
             selector (str): CSS selector of the element
             key (str): Key to press
         """
-        self._page.press(selector, key)
+        self._run(self.press_key_async(selector, key))
+
+    async def hover_async(self, selector: str) -> None:
+        """Hover over an element
+
+        Args:
+            selector (str): CSS selector of the element to hover over
+        """
+        await self._page.hover(selector)
 
     @action
     def hover(self, selector: str) -> None:
@@ -197,7 +467,19 @@ class Playwright(
         Args:
             selector (str): CSS selector of the element to hover over
         """
-        self._page.hover(selector)
+        self._run(self.hover_async(selector))
+
+    async def get_attribute_async(self, selector: str, name: str) -> Optional[str]:
+        """Get an attribute of an element
+
+        Args:
+            selector (str): CSS selector of the element
+            name (str): Name of the attribute
+
+        Returns:
+            str: The attribute value
+        """
+        return await self._page.get_attribute(selector, name)
 
     @observation
     def get_attribute(self, selector: str, name: str) -> Optional[str]:
@@ -210,4 +492,4 @@ class Playwright(
         Returns:
             str: The attribute value
         """
-        return self._page.get_attribute(selector, name)
+        return self._run(self.get_attribute_async(selector, name))
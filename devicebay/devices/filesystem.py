@@ -1,9 +1,128 @@
-from typing import Optional, Type, List
+import errno
+import os
+import stat
+from typing import Optional, List, Iterator
 
 from pydantic import BaseModel
 
 from devicebay import Device, action, observation, ReactComponent
 
+try:
+    # C implementation of the difflib matcher, used when installed
+    from cdifflib import CSequenceMatcher as SequenceMatcher
+except ImportError:
+    from difflib import SequenceMatcher
+
+
+_READ_CHUNK_SIZE = 1 << 20
+
+# Errors of os.sendfile for descriptors it can't copy between, e.g. a pipe or
+# regular file as the output on macOS, which only sends to sockets
+_SENDFILE_UNSUPPORTED = frozenset(
+    (errno.ENOTSOCK, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP)
+)
+
+
+def _read_fd(fd: int) -> bytes:
+    """Read a file descriptor to the end
+
+    Args:
+        fd (int): File descriptor opened for reading
+
+    Returns:
+        bytes: The contents
+    """
+    size = os.fstat(fd).st_size
+    data = os.read(fd, size) if size else b""
+    if size and len(data) == size:
+        return data
+
+    # Short read or a file that doesn't report its size, read to EOF
+    chunks = [data]
+    chunk = os.read(fd, _READ_CHUNK_SIZE)
+    while chunk:
+        chunks.append(chunk)
+        chunk = os.read(fd, _READ_CHUNK_SIZE)
+    return b"".join(chunks)
+
+
+def _write_file(path: str, data: bytes, flags: int) -> None:
+    """Write bytes to a file through a raw descriptor
+
+    Args:
+        path (str): Full path of the file
+        data (bytes): Data to write
+        flags (int): Flags to open the file with, in addition to O_WRONLY | O_CREAT
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | flags, 0o666)
+    try:
+        _write_fd(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _write_fd(fd: int, data: bytes) -> None:
+    """Write all bytes to a file descriptor
+
+    Args:
+        fd (int): File descriptor opened for writing
+        data (bytes): Data to write
+    """
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _format_range_unified(start: int, stop: int) -> str:
+    """Format a line range in unified diff format, as difflib does"""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def _unified_diff(
+    a: List[str], b: List[str], fromfile: str, tofile: str, n: int = 3
+) -> Iterator[str]:
+    """Unified diff of two lists of lines, equivalent to difflib.unified_diff
+
+    Args:
+        a (List[str]): Original lines
+        b (List[str]): New lines
+        fromfile (str): Name of the original file
+        tofile (str): Name of the new file
+        n (int, optional): Number of context lines. Defaults to 3.
+
+    Yields:
+        str: Lines of the diff
+    """
+    started = False
+    for group in SequenceMatcher(None, a, b).get_grouped_opcodes(n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}\n"
+            yield f"+++ {tofile}\n"
+
+        first, last = group[0], group[-1]
+        file1_range = _format_range_unified(first[1], last[2])
+        file2_range = _format_range_unified(first[3], last[4])
+        yield f"@@ -{file1_range} +{file2_range} @@\n"
+
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    yield " " + line
+                continue
+            if tag in ("replace", "delete"):
+                for line in a[i1:i2]:
+                    yield "-" + line
+            if tag in ("replace", "insert"):
+                for line in b[j1:j2]:
+                    yield "+" + line
+
 
 class FSConnectConfig(BaseModel):
     """Connect configuration for a filesystem"""
@@ -32,7 +151,7 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
 
     def __init__(self, root_path: str) -> None:
         super().__init__()
-        self._root_path = root_path
+        self._root_path = os.fspath(root_path)
         self._config: FSConnectConfig = FSConnectConfig(path=root_path)
 
     @classmethod
@@ -100,25 +219,18 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
         Returns:
             FSConnectConfg: Connect configuration for this device
         """
-        return FSConnectConfig(path=self._config.path)
-
-    @classmethod
-    def connect_config_type(cls) -> Type[FSConnectConfig]:
-        """Type of connect configuration
+        return self._config
 
-        Returns:
-            Type[FSConnectConfig]: Type of connect configuration
-        """
-        return FSConnectConfig
+    def _resolve(self, path: str) -> str:
+        """Resolve a path against the root path
 
-    @classmethod
-    def provision_config_type(cls) -> Type[FSProvisionConig]:
-        """Type of provision configuration
+        Args:
+            path (str): Path relative to root path
 
         Returns:
-            Type[P]: Type of provisioner configuration
+            str: The full path
         """
-        return FSProvisionConig
+        return os.path.join(self._root_path, path.lstrip("/"))
 
     @action
     def create_file(self, path: str, content: str) -> None:
@@ -128,8 +240,7 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
             path (str): Path relative to root path
             content (str): Content of the file
         """
-        with open(f"{self._root_path}/{path}", "w") as f:
-            f.write(content)
+        _write_file(self._resolve(path), content.encode(), os.O_TRUNC)
 
     @observation
     def read_file(self, path: str) -> str:
@@ -141,8 +252,50 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
         Returns:
             str: The file
         """
-        with open(f"{self._root_path}/{path}", "r") as f:
-            return f.read()
+        fd = os.open(self._resolve(path), os.O_RDONLY)
+        try:
+            text = _read_fd(fd).decode()
+        finally:
+            os.close(fd)
+        # Universal newlines, as reading in text mode does
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def read_file_to_fd(self, path: str, out_fd: int) -> int:
+        """Copy a file to a file descriptor without reading it into Python
+
+        Uses os.sendfile where available, e.g. to stream a file to a socket, and
+        falls back to copying through Python where the descriptors don't allow it.
+
+        Args:
+            path (str): Path relative to root path
+            out_fd (int): File descriptor to write to
+
+        Returns:
+            int: Number of bytes written
+        """
+        fd = os.open(self._resolve(path), os.O_RDONLY)
+        try:
+            if hasattr(os, "sendfile"):
+                size = os.fstat(fd).st_size
+                offset = 0
+                try:
+                    while offset < size:
+                        sent = os.sendfile(out_fd, fd, offset, size - offset)
+                        if not sent:
+                            break
+                        offset += sent
+                    return offset
+                except OSError as e:
+                    # Fall back only if nothing was sent yet; sendfile with an
+                    # offset leaves the file position at the start
+                    if offset or e.errno not in _SENDFILE_UNSUPPORTED:
+                        raise
+
+            data = _read_fd(fd)
+            _write_fd(out_fd, data)
+            return len(data)
+        finally:
+            os.close(fd)
 
     @action
     def create_dir(self, path: str) -> None:
@@ -151,9 +304,7 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
         Args:
             path (str): Path relative to root path
         """
-        import os
-
-        os.makedirs(f"{self._root_path}/{path}")
+        os.makedirs(self._resolve(path))
 
     @observation
     def list_dir(self, path: str) -> List[FileInfo]:
@@ -165,23 +316,19 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
         Returns:
             List[FileInfo]: The file info
         """
-        import os
-        import stat
-        from datetime import datetime
-
         files = []
-        for f in os.listdir(f"{self._root_path}/{path}"):
-            f_path = f"{self._root_path}/{path}/{f}"
-            st = os.stat(f_path)
-            files.append(
-                FileInfo(
-                    name=f,
-                    type=stat.S_IFMT(st.st_mode),
-                    created=datetime.fromtimestamp(st.st_ctime).timestamp(),
-                    updated=datetime.fromtimestamp(st.st_mtime).timestamp(),
-                    size=st.st_size,
+        with os.scandir(self._resolve(path)) as entries:
+            for entry in entries:
+                st = entry.stat()
+                files.append(
+                    FileInfo.model_construct(
+                        name=entry.name,
+                        type=stat.S_IFMT(st.st_mode),
+                        created=st.st_ctime,
+                        updated=st.st_mtime,
+                        size=st.st_size,
+                    )
                 )
-            )
         return files
 
     @action
@@ -191,9 +338,7 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
         Args:
             path (str): Path relative to root path
         """
-        import os
-
-        os.remove(f"{self._root_path}/{path}")
+        os.remove(self._resolve(path))
 
     @action
     def delete_dir(self, path: str) -> None:
@@ -202,9 +347,7 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
         Args:
             path (str): Path relative to root path
         """
-        import os
-
-        os.rmdir(f"{self._root_path}/{path}")
+        os.rmdir(self._resolve(path))
 
     @action
     def append_file(self, path: str, content: str) -> None:
@@ -214,8 +357,7 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
             path (str): Path relative to root path
             content (str): Content to append
         """
-        with open(f"{self._root_path}/{path}", "a") as f:
-            f.write(content)
+        _write_file(self._resolve(path), content.encode(), os.O_APPEND)
 
     @action
     def get_diff(self, path: str, content: str) -> str:
@@ -228,18 +370,14 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
         Returns:
             str: The diff in unified diff format
         """
-        import difflib
-
-        # Correcting the splitlines usage by explicitly using `keepends=True`
-        with open(f"{self._root_path}/{path}", "r") as f:
-            old = f.read()
-            # Splitting lines and keeping line breaks
-            diff = difflib.unified_diff(
-                old.splitlines(keepends=True),
-                content.splitlines(keepends=True),
-                fromfile=path,
-                tofile=path,
-            )
+        old = self.read_file(path)
+        # Splitting lines and keeping line breaks
+        diff = _unified_diff(
+            old.splitlines(keepends=True),
+            content.splitlines(keepends=True),
+            fromfile=path,
+            tofile=path,
+        )
         return "\n".join(diff)
 
     @action
@@ -250,5 +388,4 @@ class FileSystem(Device[FSConnectConfig, "FileSystem", FSProvisionConig]):
             path (str): Path relative to root path
             content (str): Content to overwrite with
         """
-        with open(f"{self._root_path}/{path}", "w") as f:
-            f.write(content)
+        _write_file(self._resolve(path), content.encode(), os.O_TRUNC)
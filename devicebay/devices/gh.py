@@ -1,14 +1,181 @@
-from typing import Optional, List, Dict
+import base64
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional, List, Dict, Tuple, TypeVar
 
 from pydantic import BaseModel
 
-from github import Github, PullRequest, Issue
+from github import (
+    Github,
+    GithubException,
+    PullRequest,
+    Issue,
+    RateLimitExceededException,
+)
+from github.GithubObject import CompletableGithubObject
 from github.Issue import Issue
 from github.Repository import Repository
 from github.PullRequest import PullRequest
 
 from devicebay import Device, action, observation
 
+logger = logging.getLogger(__name__)
+
+O = TypeVar("O", bound=CompletableGithubObject)
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Requests kept in reserve before waiting for the rate limit to reset, enough
+# for the calls the shared executor may already have in flight
+_RATE_LIMIT_RESERVE = 10
+# Times a call is retried after hitting the rate limit
+_RATE_LIMIT_RETRIES = 3
+
+# Blobs larger than this many bytes are fetched over REST instead of GraphQL,
+# keeping GraphQL responses small enough to stay within GitHub's limits
+_GRAPHQL_BLOB_SIZE_LIMIT = 100 * 1024
+# Blobs whose text is fetched by a single GraphQL query
+_GRAPHQL_BLOB_BATCH_SIZE = 50
+
+
+def _blob_texts_query(shas: List[str]) -> str:
+    """GraphQL query for the text of blobs, aliased `b0`, `b1`, ... by position"""
+    objects = " ".join(
+        f'b{i}: object(oid: "{sha}") {{ ... on Blob {{ isBinary isTruncated text }} }}'
+        for i, sha in enumerate(shas)
+    )
+    return (
+        "query($owner: String!, $name: String!) {"
+        f" repository(owner: $owner, name: $name) {{ {objects} }} }}"
+    )
+
+
+class _TTLCache:
+    """A thread safe LRU cache whose entries expire after `ttl` seconds"""
+
+    def __init__(self, maxsize: int = 128, ttl: float = 60.0) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[Any], bool]:
+        """Look up a value
+
+        Expired values are kept until evicted so they can be revalidated.
+
+        Returns:
+            Tuple[Optional[Any], bool]: The value or None, and whether it is unexpired
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None, False
+            self._data.move_to_end(key)
+            expires, value = item
+            return value, expires >= time.monotonic()
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Set a value, evicting the least recently used one when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+
+# Decoded texts of recently read blobs, a blob never changes for its SHA
+_BLOB_CACHE = _TTLCache(maxsize=32, ttl=float("inf"))
+
+
+def _decode_blob(sha: str, encoding: str, content: str) -> str:
+    """Decode base64 blob content as UTF-8, once per blob
+
+    Args:
+        sha (str): SHA of the blob, identical files share it
+        encoding (str): Encoding of the content as reported by GitHub
+        content (str): Encoded content
+
+    Returns:
+        str: The decoded content
+    """
+    text, _ = _BLOB_CACHE.lookup(sha)
+    if text is None:
+        if encoding != "base64":
+            # GitHub leaves out the content of files over 1 MB
+            raise ValueError(f"Unsupported encoding '{encoding}' of blob {sha}")
+        text = base64.b64decode(content).decode("utf-8")
+        _BLOB_CACHE.set(sha, text)
+    return text
+
+
+def _rate_limit_wait(headers: Optional[Dict[str, str]]) -> float:
+    """Seconds to wait before retrying a rate limited request
+
+    Args:
+        headers (Optional[Dict[str, str]]): Headers of the rate limited response
+
+    Returns:
+        float: Seconds to wait
+    """
+    headers = {key.lower(): value for key, value in (headers or {}).items()}
+    if "retry-after" in headers:
+        return float(headers["retry-after"])
+    if "x-ratelimit-reset" in headers:
+        return max(0.0, float(headers["x-ratelimit-reset"]) - time.time())
+    # Secondary rate limits without headers, GitHub asks to wait at least a minute
+    return 60.0
+
+
+# Marks threads already inside a rate limited GitHub device method
+_rate_limit_scope = threading.local()
+
+
+def _with_rate_limit(method: F) -> F:
+    """Wait out GitHub rate limits around a GitHub device method
+
+    Waits for the reset when the last response left too few requests, and
+    retries calls that hit the primary or secondary rate limit. Methods
+    called from another wrapped method run unwrapped, so only the outermost
+    call waits and retries.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: "GitHub", *args, **kwargs):
+        if getattr(_rate_limit_scope, "active", False):
+            return method(self, *args, **kwargs)
+
+        _rate_limit_scope.active = True
+        try:
+            remaining, _ = self._github.rate_limiting
+            if remaining < _RATE_LIMIT_RESERVE:
+                wait = self._github.rate_limiting_resettime - time.time()
+                if wait > 0:
+                    logger.warning(
+                        f"GitHub rate limit nearly exhausted, waiting {wait:.0f}s"
+                    )
+                    time.sleep(wait + random.uniform(0, 1))
+
+            for attempt in range(_RATE_LIMIT_RETRIES + 1):
+                try:
+                    return method(self, *args, **kwargs)
+                except RateLimitExceededException as e:
+                    if attempt == _RATE_LIMIT_RETRIES:
+                        raise
+                    wait = _rate_limit_wait(e.headers) + random.uniform(0, 1)
+                    logger.warning(
+                        f"GitHub rate limit exceeded, retrying in {wait:.0f}s"
+                    )
+                    time.sleep(wait)
+        finally:
+            _rate_limit_scope.active = False
+
+    return wrapper  # type: ignore
+
 
 class GitHubConnectConfig(BaseModel):
     """Connect configuration for GitHub"""
@@ -25,12 +192,49 @@ class GitHubProvisionConfig(BaseModel):
 class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
     """A GitHub device"""
 
+    # Shared by all GitHub devices, bounding concurrent requests to stay clear
+    # of GitHub's secondary rate limits
+    _executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="devicebay-gh")
+
     def __init__(self, config: GitHubConnectConfig) -> None:
         super().__init__()
         self._config = config
-        self._github = Github(config.access_token)
+        # Pages of 100 instead of 30 cut the requests made by paginated listings
+        self._github = Github(config.access_token, per_page=100)
+        # Lazy, the login is fetched from /user once on first use and then reused
+        self._user = self._github.get_user()
+        # Lookups are reused for a short while so chained calls such as
+        # comment_on_pull_request don't refetch the same objects
+        self._repo_cache = _TTLCache()
+        self._pull_request_cache = _TTLCache()
+        self._issue_cache = _TTLCache()
+
+    def _cached(self, cache: _TTLCache, key: Hashable, fetch: Callable[[], O]) -> O:
+        """Get an object through a cache, revalidating it once expired
+
+        Expired objects are refreshed with a conditional request, which GitHub
+        answers with 304 Not Modified without counting against the rate limit.
+
+        Args:
+            cache (_TTLCache): The cache
+            key (Hashable): Key of the object
+            fetch (Callable[[], O]): Fetches the object on a cache miss
+
+        Returns:
+            O: The object
+        """
+        obj, fresh = cache.lookup(key)
+        if fresh:
+            return obj
+        if obj is None:
+            obj = fetch()
+        else:
+            obj.update()
+        cache.set(key, obj)
+        return obj
 
     @observation
+    @_with_rate_limit
     def get_repository(self, name: str) -> Repository:
         """Get a repository by name
 
@@ -40,9 +244,10 @@ class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
         Returns:
             Repository: The repository
         """
-        return self._github.get_user().get_repo(name)
+        return self._cached(self._repo_cache, name, lambda: self._user.get_repo(name))
 
     @action
+    @_with_rate_limit
     def create_pull_request(
         self, repo_name: str, title: str, head: str, base: str, body: str = ""
     ) -> None:
@@ -59,6 +264,7 @@ class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
         repo.create_pull(title=title, body=body, head=head, base=base)
 
     @observation
+    @_with_rate_limit
     def get_pull_request(self, repo_name: str, pr_number: int) -> PullRequest:
         """Get a pull request by number
 
@@ -69,10 +275,14 @@ class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
         Returns:
             PullRequest: The pull request
         """
-        repo: Repository = self.get_repository(repo_name)
-        return repo.get_pull(pr_number)
+        return self._cached(
+            self._pull_request_cache,
+            (repo_name, pr_number),
+            lambda: self.get_repository(repo_name).get_pull(pr_number),
+        )
 
     @action
+    @_with_rate_limit
     def comment_on_pull_request(
         self, repo_name: str, pr_number: int, body: str
     ) -> None:
@@ -87,6 +297,7 @@ class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
         pr.create_issue_comment(body)
 
     @action
+    @_with_rate_limit
     def create_issue(
         self,
         repo_name: str,
@@ -108,6 +319,7 @@ class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
         repo.create_issue(title=title, body=body, assignee=assignee, labels=labels)  # type: ignore
 
     @observation
+    @_with_rate_limit
     def get_issue(self, repo_name: str, issue_number: int) -> Issue:
         """Get an issue by number
 
@@ -118,10 +330,14 @@ class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
         Returns:
             Issue: The issue
         """
-        repo: Repository = self.get_repository(repo_name)
-        return repo.get_issue(issue_number)
+        return self._cached(
+            self._issue_cache,
+            (repo_name, issue_number),
+            lambda: self.get_repository(repo_name).get_issue(issue_number),
+        )
 
     @action
+    @_with_rate_limit
     def comment_on_issue(self, repo_name: str, issue_number: int, body: str) -> None:
         """Comment on an issue
 
@@ -135,33 +351,81 @@ class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
 
     def _get_repository_contents_recursive(
         self, repo: Repository, path: str
-    ) -> List[Dict[str, str]]:
+    ) -> List[Dict[str, Any]]:
         """Recursively get the contents of a repository
 
+        Walks the tree breadth first, listing the directories of each level
+        concurrently.
+
         Args:
             repo (Repository): The repository
             path (str): Path of the directory
 
         Returns:
-            List[Dict[str, str]]: List of file information
+            List[Dict[str, Any]]: Path, name, type, SHA and size of each file
         """
-        contents = repo.get_contents(path)
-        if not isinstance(contents, list):
-            contents = [contents]
+        files = []
+        paths = [path]
+        while paths:
+            subdirs = []
+            for contents in self._executor.map(repo.get_contents, paths):
+                if not isinstance(contents, list):
+                    contents = [contents]
+                for content in contents:
+                    if content.type == "dir":
+                        subdirs.append(content.path)
+                    else:
+                        files.append(
+                            {
+                                "path": content.path,
+                                "name": content.name,
+                                "type": content.type,
+                                "sha": content.sha,
+                                "size": content.size,
+                            }
+                        )
+            paths = subdirs
+        return files
+
+    def _list_repository_tree(self, repo: Repository) -> List[Dict[str, Any]]:
+        """Get all files of a repository from a single recursive Git Trees request
+
+        Falls back to walking the contents API if GitHub truncates the tree.
+
+        Args:
+            repo (Repository): The repository
+
+        Returns:
+            List[Dict[str, Any]]: Path, name, type, SHA and size of each file,
+                typed "file", "symlink" or "submodule"
+        """
+        tree = repo.get_git_tree(repo.default_branch, recursive=True)
+        if tree.raw_data.get("truncated"):
+            return self._get_repository_contents_recursive(repo, "")
 
         files = []
-        for content in contents:
-            if content.type == "dir":
-                files.extend(
-                    self._get_repository_contents_recursive(repo, content.path)
-                )
+        for element in tree.tree:
+            if element.type == "tree":
+                continue
+            if element.type == "commit":
+                file_type = "submodule"
+            elif element.mode == "120000":
+                file_type = "symlink"
             else:
-                files.append(
-                    {"path": content.path, "name": content.name, "type": content.type}
-                )
+                file_type = "file"
+            files.append(
+                {
+                    "path": element.path,
+                    "name": element.path.rsplit("/", 1)[-1],
+                    "type": file_type,
+                    "sha": element.sha,
+                    "size": element.size,
+                }
+            )
         return files
 
     @observation
+    @_with_rate_limit
     def list_repository_files(self, repo_name: str) -> List[Dict[str, str]]:
         """List all files in a repository
 
@@ -172,12 +436,78 @@ class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
             List[Dict[str, str]]: List of file information
         """
         repo: Repository = self.get_repository(repo_name)
-        return self._get_repository_contents_recursive(repo, "")
+        return [
+            {key: file[key] for key in ("path", "name", "type", "sha")}
+            for file in self._list_repository_tree(repo)
+        ]
+
+    def _get_blob_texts(
+        self, repo: Repository, shas: List[str]
+    ) -> Dict[str, Optional[str]]:
+        """Get the text of blobs from a single GraphQL query
+
+        Args:
+            repo (Repository): The repository
+            shas (List[str]): SHAs of the blobs
+
+        Returns:
+            Dict[str, Optional[str]]: Texts by SHA, None for binary blobs. Blobs
+                GraphQL did not return the full text of are left out
+        """
+        owner, name = repo.full_name.split("/", 1)
+        try:
+            # PyGithub has no public raw GraphQL call taking typed variables
+            _, data = repo._requester.requestJsonAndCheck(
+                "POST",
+                repo._requester.graphql_url,
+                input={
+                    "query": _blob_texts_query(shas),
+                    "variables": {"owner": owner, "name": name},
+                },
+            )
+        except RateLimitExceededException:
+            raise
+        except GithubException as e:
+            logger.warning(f"GraphQL blob query failed, falling back to REST: {e}")
+            return {}
+        if "errors" in data:
+            logger.warning(f"GraphQL blob query returned errors: {data['errors']}")
+
+        repository = (data.get("data") or {}).get("repository") or {}
+        texts: Dict[str, Optional[str]] = {}
+        for i, sha in enumerate(shas):
+            blob = repository.get(f"b{i}")
+            if not blob or blob.get("isTruncated"):
+                continue
+            if blob.get("isBinary"):
+                texts[sha] = None
+            elif blob.get("text") is not None:
+                texts[sha] = blob["text"]
+        return texts
+
+    def _get_blob_text(self, repo: Repository, sha: str) -> Optional[str]:
+        """Get the text of a blob over REST
+
+        Args:
+            repo (Repository): The repository
+            sha (str): SHA of the blob
+
+        Returns:
+            Optional[str]: The text, None for binary blobs
+        """
+        blob = repo.get_git_blob(sha)
+        try:
+            return _decode_blob(sha, blob.encoding, blob.content)
+        except UnicodeDecodeError:
+            return None
 
     @observation
+    @_with_rate_limit
     def get_repository_files(self, repo_name: str) -> Dict[str, str]:
         """Get all files in a repository
 
+        Binary files are skipped.
+
         Args:
             repo_name (str): Name of the repository
 
@@ -185,16 +515,46 @@ class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
             Dict[str, str]: Dictionary of file paths and their contents
         """
         repo: Repository = self.get_repository(repo_name)
-        files = self._get_repository_contents_recursive(repo, "")
-        file_contents = {}
-        for file in files:
-            content = repo.get_contents(file["path"])
-            if isinstance(content, list):
-                continue  # Skip directories
-            file_contents[file["path"]] = content.decoded_content.decode("utf-8")
-        return file_contents
+        # Symlinks are blobs holding their target, submodules have no blob
+        blobs = [
+            (file["path"], file["sha"], file["size"])
+            for file in self._list_repository_tree(repo)
+            if file["type"] in ("file", "symlink")
+        ]
+
+        # Files with identical content share a single blob
+        small = list(
+            dict.fromkeys(
+                sha
+                for _, sha, size in blobs
+                if size is None or size <= _GRAPHQL_BLOB_SIZE_LIMIT
+            )
+        )
+        batches = [
+            small[i : i + _GRAPHQL_BLOB_BATCH_SIZE]
+            for i in range(0, len(small), _GRAPHQL_BLOB_BATCH_SIZE)
+        ]
+        texts: Dict[str, Optional[str]] = {}
+        for batch_texts in self._executor.map(
+            lambda batch: self._get_blob_texts(repo, batch), batches
+        ):
+            texts.update(batch_texts)
+
+        # Large blobs, and those GraphQL did not return, go through the Git
+        # Blobs API, which returns the content by SHA without resolving a path
+        rest = [
+            sha for sha in dict.fromkeys(sha for _, sha, _ in blobs) if sha not in texts
+        ]
+        texts.update(
+            zip(
+                rest,
+                self._executor.map(lambda sha: self._get_blob_text(repo, sha), rest),
+            )
+        )
+        return {path: texts[sha] for path, sha, _ in blobs if texts[sha] is not None}
 
     @observation
+    @_with_rate_limit
     def get_repository_file(self, repo_name: str, path: str) -> str:
         """Get a single file from a repository
 
@@ -209,4 +569,4 @@ class GitHub(Device[GitHubConnectConfig, "GitHub", GitHubProvisionConfig]):
         content = repo.get_contents(path)
         if isinstance(content, list):
             raise ValueError(f"Path '{path}' points to a directory, not a file.")
-        return content.decoded_content.decode("utf-8")
+        return _decode_blob(content.sha, content.encoding, content.content)
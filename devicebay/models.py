@@ -1,5 +1,5 @@
 from typing import Optional, Dict, List, TypeVar, Generic
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 ConnectConfigType = TypeVar("ConnectConfigType")
 ProvisionConfigType = TypeVar("ProvisionConfigType")
@@ -30,11 +30,11 @@ class V1EnvVarOpt(BaseModel):
     required: bool = False
     default: Optional[str] = None
     secret: bool = False
-    options: List[str] = []
+    options: List[str] = Field(default_factory=list)
 
 
 class V1LLMProviders(BaseModel):
-    preference: List[str] = []
+    preference: List[str] = Field(default_factory=list)
 
 
 class V1DeviceTypeFile(BaseModel):
@@ -44,8 +44,8 @@ class V1DeviceTypeFile(BaseModel):
     description: str
     image: Optional[str] = None
     versions: Optional[Dict[str, str]] = None
-    env_opts: List[V1EnvVarOpt] = []
-    supported_runtimes: List[str] = []
+    env_opts: List[V1EnvVarOpt] = Field(default_factory=list)
+    supported_runtimes: List[str] = Field(default_factory=list)
     created: Optional[float] = None
     updated: Optional[float] = None
     public: bool = False
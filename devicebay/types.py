@@ -1,8 +1,9 @@
-from typing import List, Optional, Dict
+from typing import Any, Iterator, List, Optional, Dict, Type, TypeVar
 import uuid
 import time
 import json
 
+from pydantic import BaseModel
 from sqlalchemy import or_
 
 from .db.models import DeviceTypeRecord
@@ -14,10 +15,44 @@ from .models import (
     V1LLMProviders,
 )
 
+M = TypeVar("M", bound=BaseModel)
+
+try:
+    import orjson
+
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 
 class DeviceType(WithDB):
     """A type of device"""
 
+    # Records are written by to_record, so their JSON is loaded without validation
+    _TRUST_DB = True
+
+    # Fields update() copies over from a V1DeviceTypeFile
+    _UPDATE_FIELDS = (
+        "name",
+        "description",
+        "image",
+        "versions",
+        "env_opts",
+        "supported_runtimes",
+        "public",
+        "icon",
+        "mem_request",
+        "mem_limit",
+        "cpu_request",
+        "cpu_limit",
+        "gpu_mem",
+        "llm_providers",
+    )
+
     def __init__(
         self,
         name: str,
@@ -51,20 +86,23 @@ class DeviceType(WithDB):
         self.cpu_request = cpu_request
         self.cpu_limit = cpu_limit
         self.gpu_mem = gpu_mem
-        self.created = time.time()
-        self.updated = time.time()
+        now = time.time()
+        self.created = now
+        self.updated = now
         self.llm_providers: Optional[V1LLMProviders] = llm_providers
         self.save()
 
     def to_schema(self) -> V1DeviceTypeFile:
-        return V1DeviceTypeFile(
+        # Built without validation. Containers are copied so edits to the schema
+        # don't alias this device type and update() still sees them as changes
+        return V1DeviceTypeFile.model_construct(
             id=self.id,
             name=self.name,
             description=self.description,
             image=self.image,
-            versions=self.versions,
-            env_opts=self.env_opts,
-            supported_runtimes=self.supported_runtimes,
+            versions=dict(self.versions) if self.versions is not None else None,
+            env_opts=[opt.model_copy(deep=True) for opt in self.env_opts],
+            supported_runtimes=list(self.supported_runtimes),
             created=self.created,
             updated=self.updated,
             public=self.public,
@@ -102,19 +140,18 @@ class DeviceType(WithDB):
         return obj
 
     def to_record(self) -> DeviceTypeRecord:
-        versions = json.dumps(self.versions)
         llm_providers = None
         if self.llm_providers:
-            llm_providers = json.dumps(self.llm_providers.model_dump())
+            llm_providers = _json_dumps(self.llm_providers.model_dump())
 
         return DeviceTypeRecord(
             id=self.id,
             name=self.name,
             description=self.description,
             image=self.image,
-            versions=versions,
-            env_opts=json.dumps([opt.model_dump() for opt in self.env_opts]),
-            supported_runtimes=json.dumps(self.supported_runtimes),
+            versions=_json_dumps(self.versions),
+            env_opts=_json_dumps([opt.model_dump() for opt in self.env_opts]),
+            supported_runtimes=_json_dumps(self.supported_runtimes),
             created=self.created,
             updated=self.updated,
             owner_id=self.owner_id,
@@ -129,14 +166,32 @@ class DeviceType(WithDB):
         )
 
     @classmethod
-    def from_record(cls, record: DeviceTypeRecord) -> "DeviceType":
-        versions = {}
-        if len(str(record.versions)) != 0:
-            versions = json.loads(str(record.versions))
+    def _load_model(cls, model: Type[M], data: Dict[str, Any]) -> M:
+        """Build a model from data loaded from a record
 
-        llm_providers = None
-        if len(str(record.llm_providers)) != 0:
-            llm_providers = V1LLMProviders(**json.loads(str(record.llm_providers)))
+        Args:
+            model (Type[M]): The model type
+            data (Dict[str, Any]): The loaded data
+
+        Returns:
+            M: The model
+        """
+        if cls._TRUST_DB:
+            return model.model_construct(**data)
+        return model(**data)
+
+    @classmethod
+    def from_record(cls, record: DeviceTypeRecord) -> "DeviceType":
+        versions = _json_loads(record.versions) if record.versions else {}
+        env_opts = _json_loads(record.env_opts) if record.env_opts else []
+        supported_runtimes = (
+            _json_loads(record.supported_runtimes) if record.supported_runtimes else []
+        )
+        llm_providers = (
+            cls._load_model(V1LLMProviders, _json_loads(record.llm_providers))
+            if record.llm_providers
+            else None
+        )
 
         obj = cls.__new__(cls)
         obj.id = record.id
@@ -144,8 +199,8 @@ class DeviceType(WithDB):
         obj.description = record.description
         obj.image = record.image
         obj.versions = versions
-        obj.env_opts = [V1EnvVarOpt(**opt) for opt in json.loads(str(record.env_opts))]
-        obj.supported_runtimes = json.loads(str(record.supported_runtimes))
+        obj.env_opts = [cls._load_model(V1EnvVarOpt, opt) for opt in env_opts]
+        obj.supported_runtimes = supported_runtimes
         obj.created = record.created
         obj.updated = record.updated
         obj.owner_id = record.owner_id
@@ -167,17 +222,59 @@ class DeviceType(WithDB):
                 session.commit()
 
     @classmethod
-    def find(cls, **kwargs) -> List["DeviceType"]:
+    def save_many(cls, device_types: List["DeviceType"]) -> None:
+        """Save many device types in a single transaction
+
+        Args:
+            device_types (List[DeviceType]): Device types to save
+        """
         for session in cls.get_db():
-            records = session.query(DeviceTypeRecord).filter_by(**kwargs).all()
-            return [cls.from_record(record) for record in records]
+            if session:
+                for device_type in device_types:
+                    session.merge(device_type.to_record())
+                session.commit()
+
+    @classmethod
+    def find(cls, **kwargs) -> List["DeviceType"]:
+        return list(cls.iter_find(**kwargs))
+
+    @classmethod
+    def iter_find(cls, **kwargs) -> Iterator["DeviceType"]:
+        """Find device types, loading each one only as it is iterated
 
-        return []
+        The database session stays open until the iterator is exhausted or
+        closed, so prefer `find` unless stopping early.
+
+        Returns:
+            Iterator[DeviceType]: The device types
+        """
+        for session in cls.get_db():
+            for record in session.query(DeviceTypeRecord).filter_by(**kwargs):
+                yield cls.from_record(record)
 
     @classmethod
     def find_for_user(
         cls, user_id: str, name: Optional[str] = None
     ) -> List["DeviceType"]:
+        return list(cls.iter_find_for_user(user_id, name))
+
+    @classmethod
+    def iter_find_for_user(
+        cls, user_id: str, name: Optional[str] = None
+    ) -> Iterator["DeviceType"]:
+        """Find device types owned by a user or public, loading each one only as
+        it is iterated
+
+        The database session stays open until the iterator is exhausted or
+        closed, so prefer `find_for_user` unless stopping early.
+
+        Args:
+            user_id (str): ID of the user
+            name (Optional[str], optional): Name to filter by. Defaults to None.
+
+        Returns:
+            Iterator[DeviceType]: The device types
+        """
         for session in cls.get_db():
             # Base query
             query = session.query(DeviceTypeRecord).filter(
@@ -191,9 +288,8 @@ class DeviceType(WithDB):
             if name is not None:
                 query = query.filter(DeviceTypeRecord.name == name)
 
-            records = query.all()
-            return [cls.from_record(record) for record in records]
-        return []
+            for record in query:
+                yield cls.from_record(record)
 
     @classmethod
     def delete(cls, id: str, owner_id: str) -> None:
@@ -212,67 +308,15 @@ class DeviceType(WithDB):
         """
         Updates the current DeviceType instance with values from an DeviceTypeModel instance.
         """
-        # Track if any updates are needed
-        updated = False
-
-        # Compare and update fields
-        if self.name != model.name:
-            self.name = model.name
-            updated = True
-
-        if self.description != model.description:
-            self.description = model.description
-            updated = True
-
-        if self.image != model.image:
-            self.image = model.image
-            updated = True
-
-        if self.versions != model.versions:
-            self.versions = model.versions
-            updated = True
-
-        if self.env_opts != model.env_opts:
-            self.env_opts = model.env_opts
-            updated = True
-
-        if self.supported_runtimes != model.supported_runtimes:
-            self.supported_runtimes = model.supported_runtimes
-            updated = True
-
-        if self.public != model.public:
-            self.public = model.public
-            updated = True
-
-        if self.icon != model.icon:
-            self.icon = model.icon
-            updated = True
-
-        if self.mem_request != model.mem_request:
-            self.mem_request = model.mem_request
-            updated = True
-
-        if self.mem_limit != model.mem_limit:
-            self.mem_limit = model.mem_limit
-            updated = True
-
-        if self.cpu_request != model.cpu_request:
-            self.cpu_request = model.cpu_request
-            updated = True
-
-        if self.cpu_limit != model.cpu_limit:
-            self.cpu_limit = model.cpu_limit
-            updated = True
-
-        if self.gpu_mem != model.gpu_mem:
-            self.gpu_mem = model.gpu_mem
-            updated = True
-
-        if self.llm_providers != model.llm_providers:
-            self.llm_providers = model.llm_providers
-            updated = True
+        dirty = [
+            field
+            for field in self._UPDATE_FIELDS
+            if getattr(self, field) != getattr(model, field)
+        ]
+        for field in dirty:
+            setattr(self, field, getattr(model, field))
 
         # If anything was updated, set the updated timestamp and save changes
-        if updated:
+        if dirty:
             self.updated = time.time()
             self.save()